@@ -1,24 +1,81 @@
 import os
 import logging
 import re
+from collections import deque
 
 import cocotb
 from cocotb.handle import ModifiableObject, RegionObject, NonHierarchyIndexableObject
 from cocotb.handle import Force, Release
-from cocotb.triggers import GPITrigger, Timer
+from cocotb.triggers import GPITrigger, Event
 from cocotb.log import SimLog, SimLogFormatter, SimTimeContextFilter
 
 from .yosys_if import AnalyzedRTLDesign
-from .strategy import InjectionStrategy, _SET, _SEU, _SEE
+from .strategy import InjectionStrategy, _SET, _SEU, _SEE, _SEUSignal, _SETSignal
 from .goal import InjectionGoal
 
 
+# One handler per log file, shared by every injector logging to it
+_file_handlers = {}
+
+
+def _get_file_handler(log_file):
+    path = os.path.abspath(log_file)
+    fh = _file_handlers.get(path)
+    if fh is None:
+        fh = logging.FileHandler(path, mode='w')
+        fh.addFilter(SimTimeContextFilter())
+        fh.setFormatter(SimLogFormatter())
+        _file_handlers[path] = fh
+    return fh
+
+
+class _PatternFilter:
+    """Anchored match against a list of patterns, with re.match() semantics.
+
+    Plain literals are tested with a single str.startswith() call; the
+    remaining entries are compiled into one non-capturing alternation.
+    With ``literal_dots``, "." and "\\." count as the literal hierarchy
+    separator, so dotted paths such as "top.u_uart" take the literal path.
+    """
+
+    def __init__(self, patterns, literal_dots=False):
+        self.prefixes = ()
+        regexes = []
+        for p in patterns or []:
+            literal = p.replace("\\.", ".") if literal_dots else p
+            stripped = literal.replace(".", "") if literal_dots else literal
+            if re.escape(stripped) == stripped:
+                self.prefixes += (literal,)
+            else:
+                regexes.append(p)
+        self.regex = re.compile("|".join(f"(?:{p})" for p in regexes)) if regexes else None
+
+    def match(self, string):
+        if string.startswith(self.prefixes):
+            return True
+        return self.regex is not None and self.regex.match(string) is not None
+
+
+def _handle_set(see, seu_list, set_list):
+    set_list.append(see)
+
+
+def _handle_seu(see, seu_list, set_list):
+    # SEUs are dropped while any set/reset control of the flip-flop is active
+    if all(int(h[0].value) != h[1] for h in see.signal_spec.ctrl_handles):
+        seu_list.append(see)
+
+
+_DISPATCH = {_SET: _handle_set, _SEU: _handle_seu}
+
+
 class FaultInjector:
     def __init__(self, mttf_timer=None, transient_duration_timer=None,
                  injection_strategy=None, injection_goal=None,
                  count_handle=None, name_handle=None, leaf_module_info=None,
                  name=None, log_level=logging.INFO, log_file=None,
-                 max_signal_len=128, injection_goal_check=128):
+                 max_signal_len=128, injection_goal_check=128,
+                 use_immediate_writes=False):
 
         self._name = name or "default"
         self._log = SimLog(f"{self.__class__.__name__}.{self._name}")
@@ -27,17 +84,17 @@ class FaultInjector:
         self._seelog.setLevel(log_level)
 
         if log_file is not None:
-            fh = logging.FileHandler(log_file, mode='w')
-            fh.addFilter(SimTimeContextFilter())
-            fh.setFormatter(SimLogFormatter())
-            self._log.addHandler(fh)
-            self._seelog.addHandler(fh)
+            fh = _get_file_handler(log_file)
+            for log in (self._log, self._seelog):
+                if fh not in log.handlers:
+                    log.addHandler(fh)
             self._seelog.propagate = False
 
         self._faults = 0
         self._see_id = 0
         self._max_signal_len = max_signal_len
         self._injection_goal_check = injection_goal_check
+        self._use_immediate_writes = use_immediate_writes
 
         self._mttf_timer = mttf_timer
         self._transient_duration_timer = transient_duration_timer
@@ -51,6 +108,8 @@ class FaultInjector:
         self._count_handle = count_handle
         self._name_handle = name_handle
 
+        self._done = Event()
+
         self._disabled = False
         if os.getenv("SEE", "1") == "0":
             self._log.info("Fault injection disabled by environment settings.")
@@ -73,100 +132,118 @@ class FaultInjector:
 
     def _put_seu(self, see):
         try:
-            if see.signal_spec["type"] == "reg":
-                modval = int(see.signal_spec["handle"].value) ^ (1 << see.signal_index)
-                see.signal_spec["handle"].value = modval
-            elif see.signal_spec["type"] == "prim":
-                see.signal_spec["prim_handle"].value = 1
+            if see.signal_spec.type == "reg":
+                modval = int(see.signal_spec.handle.value) ^ see.bitmask
+                see.signal_spec.handle.value = modval
+            elif see.signal_spec.type == "prim":
+                see.signal_spec.prim_handle.value = 1
         except ValueError:
-            self._seelog.warning('Skipped undefined signal (%s)', see.signal_spec["handle"]._path)
+            self._seelog.warning('Skipped undefined signal (%s)', see.signal_spec.path)
 
     def _put_set_force(self, see):
+        handle = see.signal_handle if see.signal_spec.is_scalar else see.signal_handle[see.signal_index]
         try:
-            if see.signal_handle._range is None:
-                val = int(see.signal_handle)
-                see.signal_handle.value = Force(not val)
-            else:
-                val = int(see.signal_handle[see.signal_index])
-                see.signal_handle[see.signal_index].value = Force(not val)
+            val = int(handle)
+            handle.value = Force(not val)
         except ValueError:
-            self._seelog.warning("SET force skipped on undefined signal (%s)", see.signal_handle._path)
+            self._seelog.warning("SET force skipped on undefined signal (%s)", see.signal_spec.path)
 
     def _unput_set_release(self, see):
-        if see.signal_handle._range is None:
-            see.signal_handle.value = Release()
+        handle = see.signal_handle if see.signal_spec.is_scalar else see.signal_handle[see.signal_index]
+        if self._use_immediate_writes:
+            handle.setimmediatevalue(Release())
         else:
-            see.signal_handle[see.signal_index].value = Release()
+            handle.value = Release()
 
     def _put_set_rmw(self, see):
         try:
             val = int(see.signal_handle.value)
-            see.oldval = val & (1 << see.signal_index)
-            see.signal_handle.value = val ^ (1 << see.signal_index)
+            see.oldval = val & see.bitmask
+            see.signal_handle.value = val ^ see.bitmask
         except ValueError:
-            self._seelog.warning("Skipped undefined RMW SET on (%s)", see.signal_handle._path)
+            self._seelog.warning("Skipped undefined RMW SET on (%s)", see.signal_spec.path)
 
     def _unput_set_rmw(self, see):
         try:
             val = int(see.signal_handle.value)
-            if val & (1 << see.signal_index) != see.oldval:
-                see.signal_handle.value = val ^ (1 << see.signal_index)
+            if val & see.bitmask != see.oldval:
+                if self._use_immediate_writes:
+                    see.signal_handle.setimmediatevalue(val ^ see.bitmask)
+                else:
+                    see.signal_handle.value = val ^ see.bitmask
         except ValueError:
-            self._seelog.warning("Could not recover RMW SET on (%s)", see.signal_handle._path)
+            self._seelog.warning("Could not recover RMW SET on (%s)", see.signal_spec.path)
 
     async def _inject_faults(self, fault_spec):
         seu_list = []
         set_list = []
+        dispatch_get = _DISPATCH.get
 
         for see in fault_spec:
-            if isinstance(see, _SET):
-                if len(see.signal_handle) <= self._max_signal_len:
-                    set_list.append(see)
-            elif isinstance(see, _SEU):
-                if len(see.signal_spec["handle"]) > self._max_signal_len:
-                    continue
-                if all(int(h[0].value) != h[1] for h in see.signal_spec["ctrl_handles"]):
-                    seu_list.append(see)
+            handler = dispatch_get(type(see))
+            if handler:
+                handler(see, seu_list, set_list)
 
+        # The timer is awaited even when nothing was selected, so that start() keeps yielding to the simulator
         await self._mttf_timer
+        if not seu_list and not set_list:
+            return
 
         self._see_id += 1
         self._faults += len(seu_list) + len(set_list)
 
-        see_id_str = ""
-        for see in seu_list:
-            see_id_str += f"SEU_{see.signal_spec['handle']._path}[{see.signal_index}] "
-            self._seelog.info("SEE ID %d: SEU in %s[%d].", self._see_id,
-                              see.signal_spec["handle"]._path, see.signal_index)
-            self._put_seu(see)
+        sid = self._see_id
+        if self._seelog.isEnabledFor(logging.INFO):
+            seelog_info = self._seelog.info
+            for see in seu_list:
+                seelog_info("SEE ID %d: SEU in %s[%d].", sid,
+                            see.signal_spec.path, see.signal_index)
+            for see in set_list:
+                seelog_info("SEE ID %d: SET in %s[%d].", sid,
+                            see.signal_spec.path, see.signal_index)
 
-        for see in set_list:
-            see_id_str += f"SET_{see.signal_handle._path}[{see.signal_index}] "
-            self._seelog.info("SEE ID %d: SET in %s[%d].", self._see_id,
-                              see.signal_handle._path, see.signal_index)
-            self._put_set(see)
+        if self._name_handle:
+            parts = []
+            parts_append = parts.append
+            for see in seu_list:
+                parts_append(f"SEU_{see.signal_spec.path}[{see.signal_index}]")
+            for see in set_list:
+                parts_append(f"SET_{see.signal_spec.path}[{see.signal_index}]")
+            see_id_str = " ".join(parts)
 
+        # All writes of one injection are issued back-to-back so they land on the same trigger
+        put_seu = self._put_seu
+        put_set = self._put_set
+        for see in seu_list:
+            put_seu(see)
+        for see in set_list:
+            put_set(see)
         if self._count_handle:
-            self._count_handle.value = self._see_id
+            self._count_handle.value = sid
         if self._name_handle:
             self._name_handle.value = see_id_str
 
         # Only await transient reset if duration is defined
         if self._transient_duration_timer is not None:
             await self._transient_duration_timer
+            unput_set = self._unput_set
             for see in set_list:
-                self._unput_set(see)
+                unput_set(see)
 
     async def start(self):
+        self._done.clear()
         self._running = True
         if self._disabled:
+            self._done.set()
             return
 
         self._injection_strategy.initialize(self._seu_signals, self._set_signals)
         self._log.info("Starting SEE injection.")
         see_gen = iter(self._injection_strategy)
 
-        while not self._injection_goal.eval(self._faults, len(self._seu_signals) + len(self._set_signals)) and self._running:
+        total_candidates = len(self._seu_signals) + len(self._set_signals)
+        goal_eval = self._injection_goal.eval
+        while not goal_eval(self._faults, total_candidates) and self._running:
             for _ in range(self._injection_goal_check):
                 see_list = next(see_gen)
                 await self._inject_faults(see_list)
@@ -175,13 +252,14 @@ class FaultInjector:
 
         self._log.info("SEE injection complete.")
         self._running = False
+        self._done.set()
 
     def stop(self):
         self._running = False
+        self._done.set()
 
     async def join(self):
-        while self._running:
-            await Timer(1, "us")
+        await self._done.wait()
 
     def print_summary(self):
         self._log.info("Injected %d SEEs into %d nodes.", self._faults,
@@ -189,13 +267,15 @@ class FaultInjector:
 
 
 class HierarchyFaultInjector(FaultInjector):
-    def __init__(self, root, exclude_names=None, exclude_paths=None, exclude_modules=None, **kwargs):
+    def __init__(self, root, exclude_names=None, exclude_paths=None, exclude_modules=None,
+                 include_names=None, **kwargs):
         super().__init__(**kwargs)
         if self._disabled:
             return
 
-        self._exclude_names = "(" + ")|(".join(exclude_names or []) + ")" if exclude_names else "$^"
-        self._exclude_paths = "(" + ")|(".join(exclude_paths or []) + ")" if exclude_paths else "$^"
+        self._exclude_names = _PatternFilter(exclude_names)
+        self._exclude_paths = _PatternFilter(exclude_paths, literal_dots=True)
+        self._include_names = _PatternFilter(include_names) if include_names else None
         self._exclude_modules = exclude_modules or []
 
         if isinstance(root, RegionObject):
@@ -204,30 +284,61 @@ class HierarchyFaultInjector(FaultInjector):
             for r in root:
                 self._traverse_hierarchy(r)
 
-    def _traverse_hierarchy(self, hier, name_ovr=None):
-        mod_name = name_ovr or hier.get_definition_name()
-        for handle in hier:
-            if re.match(self._exclude_paths, handle._path):
-                continue
-            if isinstance(handle, ModifiableObject):
-                if re.match(self._exclude_names, handle._name):
+    def _traverse_hierarchy(self, root):
+        exclude_paths_regex = self._exclude_paths.regex
+        exclude_names_match = self._exclude_names.match
+        include_names = self._include_names
+        exclude_modules = self._exclude_modules
+        max_signal_len = self._max_signal_len
+        rtl = self._rtl
+        seelog_debug = self._seelog.debug
+        seu_append = self._seu_signals.append
+        set_append = self._set_signals.append
+        _isinstance = isinstance
+        _len = len
+        modifiable_cls = ModifiableObject
+        region_cls = RegionObject
+        indexable_cls = NonHierarchyIndexableObject
+
+        # Frames hold the scope's live iterator so a parent resumes where it left off, keeping the
+        # pre-order of the recursive walk. Each scope carries only the literal exclude_paths
+        # prefixes that can still match below it.
+        stack = deque([(iter(root), root, root.get_definition_name(), self._exclude_paths.prefixes)])
+        while stack:
+            handles, hier, mod_name, prefixes = stack[-1]
+            for handle in handles:
+                path = handle._path
+                if path.startswith(prefixes):
                     continue
-                is_seq = False
-                if self._rtl:
-                    ff_info = [ff for ff in self._rtl.get_module_ff_info(mod_name) if ff["q"] == handle._name]
-                    if ff_info:
-                        is_seq = True
-                        ctrl_handles = [(getattr(hier, c[0]), c[1]) for c in ff_info[0]["ctrl"]]
-                        self._seu_signals.append({
-                            "handle": handle,
-                            "ctrl_handles": ctrl_handles.copy(),
-                            "type": "reg"
-                        })
-                self._set_signals.append(handle)
-                self._seelog.debug(f"Module: {mod_name}, Signal: {handle._path}, Seq: {int(is_seq)}")
-
-            elif isinstance(handle, RegionObject):
-                if handle.get_definition_name() not in self._exclude_modules:
-                    self._traverse_hierarchy(handle)
-            elif isinstance(handle, NonHierarchyIndexableObject):
-                self._traverse_hierarchy(handle, name_ovr=mod_name)
+                if exclude_paths_regex is not None and exclude_paths_regex.match(path):
+                    continue
+                if _isinstance(handle, modifiable_cls):
+                    if exclude_names_match(handle._name):
+                        continue
+                    if include_names is not None and not include_names.match(handle._name):
+                        continue
+                    width = _len(handle)
+                    if width > max_signal_len:
+                        continue
+                    is_seq = False
+                    if rtl:
+                        ff_info = [ff for ff in rtl.get_module_ff_info(mod_name) if ff["q"] == handle._name]
+                        if ff_info:
+                            is_seq = True
+                            ctrl_handles = [(getattr(hier, c[0]), c[1]) for c in ff_info[0]["ctrl"]]
+                            seu_append(_SEUSignal(handle, width, path, ctrl_handles=tuple(ctrl_handles), type="reg"))
+                    set_append(_SETSignal(handle, width, path))
+                    seelog_debug("Module: %s, Signal: %s, Seq: %d", mod_name, path, is_seq)
+
+                elif _isinstance(handle, region_cls):
+                    def_name = handle.get_definition_name()
+                    if def_name not in exclude_modules:
+                        stack.append((iter(handle), handle, def_name,
+                                      tuple(p for p in prefixes if p.startswith(path))))
+                        break
+                elif _isinstance(handle, indexable_cls):
+                    stack.append((iter(handle), handle, mod_name,
+                                  tuple(p for p in prefixes if p.startswith(path))))
+                    break
+            else:
+                stack.pop()
@@ -2,14 +2,38 @@ import abc
 import random
 
 
+class _SEUSignal:
+    __slots__ = ("handle", "width", "path", "ctrl_handles", "type", "prim_handle")
+
+    def __init__(self, handle, width, path, ctrl_handles=(), type="reg", prim_handle=None):
+        self.handle = handle
+        self.width = width
+        self.path = path
+        self.ctrl_handles = ctrl_handles
+        self.type = type
+        self.prim_handle = prim_handle
+
+
+class _SETSignal:
+    __slots__ = ("handle", "width", "path", "is_scalar")
+
+    def __init__(self, handle, width, path):
+        self.handle = handle
+        self.width = width
+        self.path = path
+        self.is_scalar = handle._range is None
+
+
 class _SEE:
     pass
 
 
 class _SET(_SEE):
-    def __init__(self, signal_handle, signal_index):
-        self.signal_handle = signal_handle
+    def __init__(self, signal_spec, signal_index):
+        self.signal_spec = signal_spec
+        self.signal_handle = signal_spec.handle
         self.signal_index = signal_index
+        self.bitmask = 1 << signal_index
         self.oldval = 0  # Used in RMW
 
 
@@ -17,6 +41,7 @@ class _SEU(_SEE):
     def __init__(self, signal_spec, signal_index):
         self.signal_spec = signal_spec
         self.signal_index = signal_index
+        self.bitmask = 1 << signal_index
 
 
 class InjectionStrategy(metaclass=abc.ABCMeta):
@@ -43,11 +68,11 @@ class SequentialInjectionStrategy(InjectionStrategy):
         while True:
             if self._enable_set:
                 for sig in self._set_signals:
-                    for index in range(len(sig)):
+                    for index in range(sig.width):
                         yield [_SET(sig, index)]
             if self._enable_seu:
                 for sig in self._seu_signals:
-                    for index in range(len(sig["handle"])):
+                    for index in range(sig.width):
                         yield [_SEU(sig, index)]
 
 
@@ -67,15 +92,15 @@ class RandomInjectionStrategy(InjectionStrategy):
             while True:
                 if random.randint(0, total - 1) < len(self._set_signals):
                     sig = random.choice(self._set_signals)
-                    yield [_SET(sig, _random_index(sig))]
+                    yield [_SET(sig, _random_index(sig.handle))]
                 else:
                     sig = random.choice(self._seu_signals)
-                    yield [_SEU(sig, _random_index(sig["handle"]))]
+                    yield [_SEU(sig, _random_index(sig.handle))]
         elif self._enable_set:
             while True:
                 sig = random.choice(self._set_signals)
-                yield [_SET(sig, _random_index(sig))]
+                yield [_SET(sig, _random_index(sig.handle))]
         elif self._enable_seu:
             while True:
                 sig = random.choice(self._seu_signals)
-                yield [_SEU(sig, _random_index(sig["handle"]))]
+                yield [_SEU(sig, _random_index(sig.handle))]
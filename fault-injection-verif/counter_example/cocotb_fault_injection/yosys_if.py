@@ -1,9 +1,12 @@
+import hashlib
 import logging
 import os
+import pickle
+import tempfile
 from collections import defaultdict
 
 from cocotb.log import SimLog
-from .yosys_json_parser import parse_ff_info
+from .yosys_json_parser import FF_INFO_VERSION, parse_ff_info
 
 
 def setup_yosys_run_proc_mux(proc_mux):
@@ -13,6 +16,29 @@ def setup_yosys_set_log_level(log_level):
     AnalyzedRTLDesign._log_level = log_level
 
 
+def _ff_info_cache_path(yosys_json_path, cache_dir):
+    # Keyed on the file's identity and stat so a cache hit never has to read the JSON itself
+    path = os.path.abspath(yosys_json_path)
+    st = os.stat(path)
+    key = f"{FF_INFO_VERSION}:{path}:{st.st_mtime_ns}:{st.st_size}"
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+
+def _write_ff_info_cache(ff_info, cache_path):
+    # Written to a temporary file and renamed so concurrent runs never see a partial pickle
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(cache_path),
+                                         suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            pickle.dump(ff_info, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class AnalyzedRTLDesign:
     _instance = None
 
@@ -27,8 +53,23 @@ class AnalyzedRTLDesign:
             if not os.path.isfile(yosys_json_path):
                 raise FileNotFoundError(f"Yosys JSON file not found: {yosys_json_path}")
 
-            self._ff_info = parse_ff_info(yosys_json_path)
-            self._log.info(f"Parsed flip-flop information from {yosys_json_path}")
+            cache_dir = os.getenv("YOSYS_CACHE_DIR", ".cocotb_cache")
+            cache_path = _ff_info_cache_path(yosys_json_path, cache_dir) if cache_dir else None
+
+            self._ff_info = None
+            if cache_path and os.path.isfile(cache_path):
+                try:
+                    with open(cache_path, "rb") as f:
+                        self._ff_info = pickle.load(f)
+                    self._log.info(f"Loaded flip-flop information for {yosys_json_path} from {cache_path}")
+                except Exception:  # Any corrupt or foreign pickle falls back to a fresh parse
+                    self._log.warning(f"Ignoring unreadable flip-flop cache {cache_path}")
+
+            if self._ff_info is None:
+                self._ff_info = parse_ff_info(yosys_json_path)
+                self._log.info(f"Parsed flip-flop information from {yosys_json_path}")
+                if cache_path:
+                    _write_ff_info_cache(self._ff_info, cache_path)
 
         def get_module_ff_info(self, module_name):
             return self._ff_info[module_name]
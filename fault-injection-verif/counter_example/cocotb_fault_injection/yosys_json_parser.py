@@ -1,6 +1,9 @@
 import json
 from collections import defaultdict
 
+# Bump whenever the output of parse_ff_info changes, so cached results are not reused
+FF_INFO_VERSION = 1
+
 
 def parse_ff_info(json_file):
     with open(json_file, 'r') as f: